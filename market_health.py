@@ -16,18 +16,77 @@ Key concepts:
 """
 
 import asyncio
+import heapq
 import json
 import math
+import sys
 import time
 from collections import deque
-from dataclasses import dataclass
 from typing import Optional, Dict, Any
 
 import numpy as np
 import websockets
 
+try:
+    import orjson
+except ImportError:  # fall back to stdlib json on the hot path
+    orjson = None
+
+try:
+    import uvloop
+    uvloop.install()
+except ImportError:  # default asyncio loop is fine, just slower
+    pass
+
+try:
+    from numba import njit
+except ImportError:  # numba optional: kernels below still run as plain Python
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+        return wrap
+
 EPS = 1e-12
 
+if orjson is not None:
+    _loads = orjson.loads  # accepts both str and bytes frames
+    # newline appended inside the C serializer (one write, no bytes concat);
+    # numpy scalars serialize directly so callers can skip float() casts
+    _ORJSON_OPTS = orjson.OPT_APPEND_NEWLINE | orjson.OPT_SERIALIZE_NUMPY
+
+    def _dumps_line(obj) -> bytes:
+        return orjson.dumps(obj, option=_ORJSON_OPTS)
+else:
+    _loads = json.loads
+
+    def _dumps_line(obj) -> bytes:
+        return (json.dumps(obj, ensure_ascii=False) + "\n").encode()
+
+
+# =========================
+# JIT-compiled hot kernels
+# =========================
+@njit(cache=True)
+def _sum_px_qty(px: np.ndarray, qty: np.ndarray) -> float:
+    s = 0.0
+    for i in range(px.shape[0]):
+        s += px[i] * qty[i]
+    return s
+
+
+@njit(cache=True)
+def _agg_trades(px: np.ndarray, qty: np.ndarray, is_sell: np.ndarray, n: int, out: np.ndarray):
+    # out = [dollar_vol, buy_qty, sell_qty, qty_total, n_trades]
+    for i in range(n):
+        q = qty[i]
+        out[0] += px[i] * q
+        out[3] += q
+        if is_sell[i]:
+            out[2] += q
+        else:
+            out[1] += q
+    out[4] += n
+
 
 # =========================
 # Robust statistics helpers
@@ -46,9 +105,150 @@ def robust_z(x: float, arr: np.ndarray) -> float:
     return (x - med) / (1.4826 * mad)
 
 
+def robust_z_batch(x: np.ndarray, med_mad) -> np.ndarray:
+    """
+    Batched robust_z: one z per metric, given precomputed (median, MAD)
+    vectors from Rolling30m.medians_mads(). None means "not warmed up yet"
+    and every z stays neutral at 0.
+    """
+    if med_mad is None:
+        return np.zeros_like(x)
+    med, mad = med_mad
+    return (x - med) / (1.4826 * mad)
+
+
+class _SlidingMedian:
+    """
+    Two-heap sliding median with lazy deletion — O(log W) push/evict,
+    O(1) median. Classic delayed-deletion twin-heap structure.
+    """
+
+    def __init__(self):
+        self._lo = []    # max-heap (negated values)
+        self._hi = []    # min-heap
+        self._lo_n = 0   # logical sizes, excluding pending deletions
+        self._hi_n = 0
+        self._dead = {}
+
+    def push(self, v: float):
+        if self._lo_n and v > -self._lo[0]:
+            heapq.heappush(self._hi, v)
+            self._hi_n += 1
+        else:
+            heapq.heappush(self._lo, -v)
+            self._lo_n += 1
+        self._rebalance()
+
+    def evict(self, v: float):
+        # lazy: mark dead, prune when the value surfaces at a heap top
+        self._dead[v] = self._dead.get(v, 0) + 1
+        if self._lo_n and v <= -self._lo[0]:
+            self._lo_n -= 1
+            self._prune_lo()
+        else:
+            self._hi_n -= 1
+            self._prune_hi()
+        self._rebalance()
+
+    def median(self) -> float:
+        self._prune_lo()
+        if self._lo_n == self._hi_n:
+            self._prune_hi()
+            return 0.5 * (self._hi[0] - self._lo[0])
+        return -self._lo[0]
+
+    def _prune_lo(self):
+        while self._lo and self._dead.get(-self._lo[0], 0):
+            v = -heapq.heappop(self._lo)
+            self._dead[v] -= 1
+            if not self._dead[v]:
+                del self._dead[v]
+
+    def _prune_hi(self):
+        while self._hi and self._dead.get(self._hi[0], 0):
+            v = heapq.heappop(self._hi)
+            self._dead[v] -= 1
+            if not self._dead[v]:
+                del self._dead[v]
+
+    def _rebalance(self):
+        if self._lo_n > self._hi_n + 1:
+            self._prune_lo()
+            v = -heapq.heappop(self._lo)
+            self._lo_n -= 1
+            heapq.heappush(self._hi, v)
+            self._hi_n += 1
+        elif self._hi_n > self._lo_n:
+            self._prune_hi()
+            v = heapq.heappop(self._hi)
+            self._hi_n -= 1
+            heapq.heappush(self._lo, -v)
+            self._lo_n += 1
+
+
+class StreamingMAD:
+    """
+    Streaming median + MAD over a FIFO window in O(log W) per sample.
+
+    The median is exact. MAD keys each sample by |x - median_at_insert|,
+    so it drifts slightly as the median moves inside the window — fine for
+    normalization, and why this is only used for large windows (see
+    Rolling30m: maxlen >= 64) where re-medianing per minute costs more.
+    """
+
+    def __init__(self, maxlen: int):
+        self._maxlen = maxlen
+        self._vals = deque()
+        self._devs = deque()
+        self._med = _SlidingMedian()
+        self._mad = _SlidingMedian()
+        self.n = 0
+
+    def push(self, v: float):
+        if self.n == self._maxlen:
+            self._med.evict(self._vals.popleft())
+            self._mad.evict(self._devs.popleft())
+            self.n -= 1
+        self._med.push(v)
+        self._vals.append(v)
+        d = abs(v - self._med.median())
+        self._mad.push(d)
+        self._devs.append(d)
+        self.n += 1
+
+    def median(self) -> float:
+        return self._med.median()
+
+    def mad(self) -> float:
+        return self._mad.median()
+
+
 def sigmoid(x: float) -> float:
-    """Map real -> (0,1)."""
-    return 1.0 / (1.0 + math.exp(-x))
+    """Map real -> (0,1). Branch on sign so exp never overflows."""
+    if x >= 0.0:
+        z = math.exp(-x)
+        return 1.0 / (1.0 + z)
+    z = math.exp(x)
+    return z / (1.0 + z)
+
+
+# Set True to skip the libm exp call: Padé[2/2] on tanh(x/2), accurate to
+# ~5e-3 inside |x| <= 4 (the LHF/COLD scores live well inside that).
+FAST_SIGMOID = False
+
+
+def sigmoid_fast(x: float) -> float:
+    """Rational approximation of sigmoid, clamped into [0, 1]."""
+    a = x * x
+    y = 0.5 + x * (1.0 + a * 0.016666667) / (4.0 + a * 0.4)
+    if y < 0.0:
+        return 0.0
+    if y > 1.0:
+        return 1.0
+    return y
+
+
+_sigmoid = sigmoid_fast if FAST_SIGMOID else sigmoid
 
 
 # ===========================================
@@ -64,40 +264,52 @@ class BookTickerMinuteAgg:
       - spike_ratio           : max_spread / median_spread
     """
     def __init__(self):
-        self.spreads = []
+        # preallocated spread buffer, written by index (grown 2x when full)
+        self._spreads = np.empty(4096, dtype=np.float64)
+        self._n = 0
         self.first_mid = None
         self.last_mid = None
 
     def update(self, bid1: float, ask1: float):
-        mid = (bid1 + ask1) / 2.0
+        # one add, one mul, one sub, one div and a store per tick
+        mid = 0.5 * (bid1 + ask1)
         rel_spread = (ask1 - bid1) / (mid + EPS)  # relative spread
 
         if self.first_mid is None:
             self.first_mid = mid
         self.last_mid = mid
 
-        self.spreads.append(rel_spread)
+        if self._n == self._spreads.size:
+            self._spreads = np.resize(self._spreads, self._n * 2)
+        self._spreads[self._n] = rel_spread
+        self._n += 1
 
     def close_minute(self) -> Optional[Dict[str, float]]:
-        if not self.spreads or self.first_mid is None or self.last_mid is None:
+        if not self._n or self.first_mid is None or self.last_mid is None:
             self._reset()
             return None
 
-        x = np.array(self.spreads, dtype=float)
+        n = self._n
+        x = self._spreads[:n]
+        # one O(n) partition yields median, p95 and max together
+        k_med = n // 2
+        k_p95 = int(0.95 * (n - 1))
+        part = np.partition(x, sorted({k_med, k_p95, n - 1}))
+        spread_median = float(part[k_med])
         out = {
             "mid_open": float(self.first_mid),
             "mid_close": float(self.last_mid),
-            "spread_median": float(np.median(x)),
-            "spread_p95": float(np.quantile(x, 0.95)),
-            "spread_max": float(np.max(x)),
-            "spike_ratio": float(np.max(x) / (np.median(x) + EPS)),
-            "n_updates_bt": float(len(x)),
+            "spread_median": spread_median,
+            "spread_p95": float(part[k_p95]),
+            "spread_max": float(part[n - 1]),
+            "spike_ratio": float(part[n - 1] / (spread_median + EPS)),
+            "n_updates_bt": float(n),
         }
         self._reset()
         return out
 
     def _reset(self):
-        self.spreads.clear()
+        self._n = 0
         self.first_mid = None
         self.last_mid = None
 
@@ -120,24 +332,24 @@ class Depth10MinuteAgg:
     """
     def __init__(self, n_levels=10):
         self.n = n_levels
-        self.depth_usd = []
-        self.imb = []
+        # preallocated per-minute sample buffers (10 Hz stream => 4096 is ample)
+        self._depth_usd = np.empty(4096, dtype=np.float64)
+        self._imb = np.empty(4096, dtype=np.float64)
+        self._nsamples = 0
         self.first_depth = None
         self.last_depth = None
 
     @staticmethod
-    def _sum_usd(levels):
-        s = 0.0
-        for px_s, qty_s in levels:
-            s += float(px_s) * float(qty_s)
-        return s
+    def _sum_usd(levels, n):
+        # np.asarray parses all level strings to float64 in one C pass —
+        # two calls replace 2n Python float() dispatches per side
+        px = np.asarray([levels[i][0] for i in range(n)], dtype=np.float64)
+        qty = np.asarray([levels[i][1] for i in range(n)], dtype=np.float64)
+        return _sum_px_qty(px, qty)
 
     def update(self, bids_levels, asks_levels):
-        bids = bids_levels[: self.n]
-        asks = asks_levels[: self.n]
-
-        bid_usd = self._sum_usd(bids)
-        ask_usd = self._sum_usd(asks)
+        bid_usd = self._sum_usd(bids_levels, min(len(bids_levels), self.n))
+        ask_usd = self._sum_usd(asks_levels, min(len(asks_levels), self.n))
         tot = bid_usd + ask_usd
         imb = (bid_usd - ask_usd) / (tot + EPS)
 
@@ -145,31 +357,41 @@ class Depth10MinuteAgg:
             self.first_depth = tot
         self.last_depth = tot
 
-        self.depth_usd.append(tot)
-        self.imb.append(imb)
+        i = self._nsamples
+        if i == self._depth_usd.size:
+            self._depth_usd = np.resize(self._depth_usd, i * 2)
+            self._imb = np.resize(self._imb, i * 2)
+        self._depth_usd[i] = tot
+        self._imb[i] = imb
+        self._nsamples = i + 1
 
     def close_minute(self) -> Optional[Dict[str, float]]:
-        if not self.depth_usd or self.first_depth is None or self.last_depth is None:
+        if not self._nsamples or self.first_depth is None or self.last_depth is None:
             self._reset()
             return None
 
-        x = np.array(self.depth_usd, dtype=float)
-        y = np.array(self.imb, dtype=float)
+        n = self._nsamples
+        x = self._depth_usd[:n]
+        y = self._imb[:n]
+
+        # one O(n) partition yields min, p10 and median together
+        k_p10 = (n * 10) // 100
+        k_med = n // 2
+        part = np.partition(x, sorted({0, k_p10, k_med}))
 
         out = {
-            "depth_usd_median": float(np.median(x)),
-            "depth_usd_p10": float(np.quantile(x, 0.10)),
-            "depth_usd_min": float(np.min(x)),
-            "imb_median": float(np.median(y)),
+            "depth_usd_median": float(part[k_med]),
+            "depth_usd_p10": float(part[k_p10]),
+            "depth_usd_min": float(part[0]),
+            "imb_median": float(np.partition(y, k_med)[k_med]),
             "depth_recover": float((self.last_depth + EPS) / (self.first_depth + EPS)),
-            "n_updates_depth": float(len(x)),
+            "n_updates_depth": float(n),
         }
         self._reset()
         return out
 
     def _reset(self):
-        self.depth_usd.clear()
-        self.imb.clear()
+        self._nsamples = 0
         self.first_depth = None
         self.last_depth = None
 
@@ -194,98 +416,151 @@ class AggTradeMinuteAgg:
       - qty_total  : total traded qty
       - n_trades
     """
+    BATCH = 256
+
     def __init__(self):
-        self.dollar_vol = 0.0
-        self.buy_qty = 0.0
-        self.sell_qty = 0.0
-        self.qty_total = 0.0
-        self.n_trades = 0
+        # pending trades are staged in scratch arrays and flushed through the
+        # njit kernel in batches (every BATCH trades or at minute close)
+        self._px = np.empty(self.BATCH, dtype=np.float64)
+        self._qty = np.empty(self.BATCH, dtype=np.float64)
+        self._is_sell = np.empty(self.BATCH, dtype=np.bool_)
+        self._pending = 0
+        # totals = [dollar_vol, buy_qty, sell_qty, qty_total, n_trades]
+        self._totals = np.zeros(5, dtype=np.float64)
 
     def update(self, price_s: str, qty_s: str, is_buyer_maker: bool):
-        px = float(price_s)
-        qty = float(qty_s)
-
-        self.dollar_vol += px * qty
-        self.qty_total += qty
-        self.n_trades += 1
-
-        if is_buyer_maker:
-            self.sell_qty += qty
-        else:
-            self.buy_qty += qty
+        i = self._pending
+        self._px[i] = float(price_s)
+        self._qty[i] = float(qty_s)
+        self._is_sell[i] = is_buyer_maker  # buyer maker => taker sold
+        self._pending = i + 1
+        if self._pending == self.BATCH:
+            self._flush()
+
+    def _flush(self):
+        if self._pending:
+            _agg_trades(self._px, self._qty, self._is_sell, self._pending, self._totals)
+            self._pending = 0
 
     def close_minute(self) -> Dict[str, float]:
+        self._flush()
+        t = self._totals
         out = {
-            "dollar_vol": float(self.dollar_vol),
-            "buy_qty": float(self.buy_qty),
-            "sell_qty": float(self.sell_qty),
-            "cvd_delta": float(self.buy_qty - self.sell_qty),
-            "qty_total": float(self.qty_total),
-            "n_trades": float(self.n_trades),
+            "dollar_vol": float(t[0]),
+            "buy_qty": float(t[1]),
+            "sell_qty": float(t[2]),
+            "cvd_delta": float(t[1] - t[2]),
+            "qty_total": float(t[3]),
+            "n_trades": float(t[4]),
         }
         self._reset()
         return out
 
     def _reset(self):
-        self.dollar_vol = 0.0
-        self.buy_qty = 0.0
-        self.sell_qty = 0.0
-        self.qty_total = 0.0
-        self.n_trades = 0
+        self._totals[:] = 0.0
+        self._pending = 0
 
 
 # =====================================
 # Rolling 30-minute buffers for scaling
 # =====================================
-@dataclass
 class Rolling30m:
     """
     Rolling window (default 30 minutes) for robust normalization.
 
     We store raw metrics; later compute robust z on each.
+
+    Storage is a single preallocated (8, 2*maxlen) float64 ring buffer
+    (struct-of-arrays) instead of 8 deques. Every column is written twice,
+    maxlen apart, so the most recent `count` samples of each metric are
+    always one contiguous zero-copy view — no np.array(list(deque)) rebuilds.
     """
-    impact: deque
-    spread_med: deque
-    spread_p95: deque
-    spike_ratio: deque
-    depth_med: deque
-    depth_p10: deque
-    depth_recover: deque
-    dollar_vol: deque  # used for COLD (volume coldness)
+    # row indices into the SoA buffer
+    IMPACT = 0
+    SPREAD_MED = 1
+    SPREAD_P95 = 2
+    SPIKE_RATIO = 3
+    DEPTH_MED = 4
+    DEPTH_P10 = 5
+    DEPTH_RECOVER = 6
+    DOLLAR_VOL = 7  # used for COLD (volume coldness)
+
+    N_ROWS = 8
 
     def __init__(self, maxlen=30):
-        self.impact = deque(maxlen=maxlen)
-        self.spread_med = deque(maxlen=maxlen)
-        self.spread_p95 = deque(maxlen=maxlen)
-        self.spike_ratio = deque(maxlen=maxlen)
-        self.depth_med = deque(maxlen=maxlen)
-        self.depth_p10 = deque(maxlen=maxlen)
-        self.depth_recover = deque(maxlen=maxlen)
-        self.dollar_vol = deque(maxlen=maxlen)
-
-    @staticmethod
-    def _np(dq: deque) -> np.ndarray:
-        return np.array(list(dq), dtype=float)
-
-    def push(self, m: Dict[str, float]):
-        self.impact.append(m["impact"])
-        self.spread_med.append(m["spread_median"])
-        self.spread_p95.append(m["spread_p95"])
-        self.spike_ratio.append(m["spike_ratio"])
-        self.depth_med.append(m["depth_usd_median"])
-        self.depth_p10.append(m["depth_usd_p10"])
-        self.depth_recover.append(m["depth_recover"])
-        self.dollar_vol.append(m["dollar_vol"])
-
-    # convenient getters
-    def np_impact(self): return self._np(self.impact)
-    def np_spread_med(self): return self._np(self.spread_med)
-    def np_spread_p95(self): return self._np(self.spread_p95)
-    def np_spike_ratio(self): return self._np(self.spike_ratio)
-    def np_depth_med(self): return self._np(self.depth_med)
-    def np_depth_p10(self): return self._np(self.depth_p10)
-    def np_depth_recover(self): return self._np(self.depth_recover)
-    def np_dollar_vol(self): return self._np(self.dollar_vol)
+        self._maxlen = maxlen
+        self._buf = np.zeros((self.N_ROWS, 2 * maxlen), dtype=np.float64)
+        self._head = 0    # next write slot, in [0, maxlen)
+        self._count = 0
+        self.warm = False  # True once >= 5 samples (robust_z needs that many)
+        # scratch for log-compressed copies of the window (no per-minute allocs)
+        self._scratch = np.empty((self.N_ROWS, maxlen), dtype=np.float64)
+        # for wide windows, incremental O(log W) median/MAD beats re-medianing
+        # the whole matrix every minute; below that the constant factor loses
+        if maxlen >= 64:
+            self._trackers = [StreamingMAD(maxlen) for _ in range(self.N_ROWS)]
+        else:
+            self._trackers = None
+
+    def push_row(self, impact, spread_med, spread_p95, spike_ratio,
+                 depth_med, depth_p10, depth_recover, dollar_vol):
+        """Positional push matching the row layout — no dict build/lookups."""
+        col = (impact, spread_med, spread_p95, spike_ratio,
+               depth_med, depth_p10, depth_recover, dollar_vol)
+        # doubled write: any maxlen-long window ending at head stays contiguous
+        self._buf[:, self._head] = col
+        self._buf[:, self._head + self._maxlen] = col
+        self._head = (self._head + 1) % self._maxlen
+        self._count = min(self._count + 1, self._maxlen)
+        self.warm = self._count >= 5
+        if self._trackers is not None:
+            t = self._trackers
+            t[self.IMPACT].push(impact)
+            t[self.SPREAD_MED].push(spread_med)
+            t[self.SPREAD_P95].push(spread_p95)
+            t[self.SPIKE_RATIO].push(spike_ratio)
+            # same log compression the matrix path applies at read time
+            t[self.DEPTH_MED].push(math.log1p(depth_med))
+            t[self.DEPTH_P10].push(math.log1p(depth_p10))
+            t[self.DEPTH_RECOVER].push(depth_recover)
+            t[self.DOLLAR_VOL].push(math.log1p(dollar_vol))
+
+    def window(self) -> np.ndarray:
+        """Zero-copy (8, count) view of the whole window, one row per metric."""
+        end = self._head + self._maxlen
+        return self._buf[:, end - self._count:end]
+
+    def log_window(self) -> np.ndarray:
+        """
+        Copy of window() with log1p applied to the heavy-tailed rows
+        (depth median/p10, dollar vol), written into the reusable scratch.
+        """
+        mat = self.window()
+        n = mat.shape[1]
+        scratch = self._scratch[:, :n]
+        np.copyto(scratch, mat)
+        for row in (self.DEPTH_MED, self.DEPTH_P10, self.DOLLAR_VOL):
+            np.log1p(scratch[row], out=scratch[row])
+        return scratch
+
+    def medians_mads(self):
+        """
+        (median, MAD) 8-vectors over the current window, or None while the
+        window is too small (< 5 minutes). Uses the O(log W) streaming
+        trackers when enabled, else one batched np.median pass.
+        """
+        if not self.warm:
+            return None
+        if self._trackers is not None:
+            med = np.fromiter((t.median() for t in self._trackers),
+                              dtype=np.float64, count=self.N_ROWS)
+            mad = np.fromiter((t.mad() for t in self._trackers),
+                              dtype=np.float64, count=self.N_ROWS) + EPS
+            return med, mad
+        mat = self.log_window()
+        med = np.median(mat, axis=1)
+        mad = np.median(np.abs(mat - med[:, None]), axis=1) + EPS
+        return med, mad
 
 
 # ===========================================
@@ -307,45 +582,57 @@ def compute_factors(minute: Dict[str, float], roll: Rolling30m) -> Dict[str, Any
       - flow_cons: sign(ret) vs sign(cvd_delta) consistency (health bonus)
       - z-scores: robust z within rolling 30m
     """
+    # bind the hot scalars once (dict lookups + math calls dominate here)
+    ret = minute["ret_1m"]
+    cvd = minute["cvd_delta"]
+    dv = minute["dollar_vol"]
+    qty = minute["qty_total"]
+    spm = minute["spread_median"]
+    sp95 = minute["spread_p95"]
+    spike = minute["spike_ratio"]
+    dmed = minute["depth_usd_median"]
+    dp10 = minute["depth_usd_p10"]
+    drec = minute["depth_recover"]
+    abs_ret = abs(ret)
+
     # ============ derived microstructure metrics ============
-    impact = abs(minute["ret_1m"]) / (minute["dollar_vol"] + EPS)
+    impact = abs_ret / (dv + EPS)
     minute["impact"] = impact
 
     # absorption: big orderflow energy but price barely moves => absorption / hidden liquidity
-    cvd_intensity = abs(minute["cvd_delta"]) / (minute["qty_total"] + EPS)
-    absorption = (cvd_intensity > 0.55) and (minute["dollar_vol"] > 0) and (abs(minute["ret_1m"]) < 0.0003)
+    # cheapest/most-often-false test first; |cvd|/qty > 0.55 rewritten without the division
+    absorption = (abs_ret < 0.0003) and (dv > 0.0) and (abs(cvd) > 0.55 * (qty + EPS))
     minute["absorption_flag"] = 1.0 if absorption else 0.0
 
     # flow-price consistency: in healthy discovery, orderflow direction often matches return direction
-    if minute["ret_1m"] == 0.0 or minute["cvd_delta"] == 0.0:
+    # (plain compares instead of np.sign — scalar ufunc dispatch is slow)
+    if ret == 0.0 or cvd == 0.0:
         flow_cons = 0.5
     else:
-        flow_cons = 1.0 if np.sign(minute["ret_1m"]) == np.sign(minute["cvd_delta"]) else 0.0
+        flow_cons = 1.0 if (ret > 0.0) == (cvd > 0.0) else 0.0
     minute["flow_cons"] = float(flow_cons)
 
     # ============ robust normalization with rolling 30m ============
-    # LHF normalization
-    z_impact = robust_z(impact, roll.np_impact())
-    z_spread = robust_z(minute["spread_median"], roll.np_spread_med())
-    z_spread_tail = robust_z(minute["spread_p95"], roll.np_spread_p95())
-    z_spike = robust_z(minute["spike_ratio"], roll.np_spike_ratio())
-
-    # depth uses log compression (depth distribution is heavy-tailed)
-    z_depth = robust_z(
-        math.log(minute["depth_usd_median"] + 1.0),
-        np.log(roll.np_depth_med() + 1.0) + EPS
-    )
-    z_depth_p10 = robust_z(
-        math.log(minute["depth_usd_p10"] + 1.0),
-        np.log(roll.np_depth_p10() + 1.0) + EPS
-    )
-    z_res = robust_z(minute["depth_recover"], roll.np_depth_recover())
-
-    # COLD additionally uses dollar volume (low vol => colder)
-    z_dv = robust_z(
-        math.log(minute["dollar_vol"] + 1.0),
-        np.log(roll.np_dollar_vol() + 1.0) + EPS
-    )
+    # One batched robust_z over the (8, N) window matrix; depth/volume rows
+    # use log compression (heavy-tailed distributions). During warm-up
+    # (first 4 minutes) skip the whole pipeline — every z is neutral anyway.
+    if roll.warm:
+        x_vec = np.array([
+            impact,
+            spm,
+            sp95,
+            spike,
+            math.log1p(dmed),
+            math.log1p(dp10),
+            drec,
+            math.log1p(dv),  # COLD: low vol => colder
+        ], dtype=np.float64)
+
+        zs = robust_z_batch(x_vec, roll.medians_mads())
+        z_impact, z_spread, z_spread_tail, z_spike, z_depth, z_depth_p10, z_res, z_dv = zs
+    else:
+        z_impact = z_spread = z_spread_tail = z_spike = 0.0
+        z_depth = z_depth_p10 = z_res = z_dv = 0.0
 
     # ======================================================
     # LHF: Liquidity Health Factor (higher is better)
@@ -369,7 +656,7 @@ def compute_factors(minute: Dict[str, float], roll: Rolling30m) -> Dict[str, Any
     lhf_good += 0.05 * (2.0 * flow_cons - 1.0)         # 0/1 -> -1/+1
     lhf_good += 0.10 * (-(minute["absorption_flag"]))   # absorption => penalty
 
-    lhf = 100.0 * sigmoid(1.2 * lhf_good)
+    lhf = 100.0 * _sigmoid(1.2 * lhf_good)
 
     # ======================================================
     # COLD: Cold/Fragility Factor (higher is worse / colder)
@@ -395,19 +682,10 @@ def compute_factors(minute: Dict[str, float], roll: Rolling30m) -> Dict[str, Any
     cold_bad += 0.04 * (-z_res)           # slow recovery => colder
     cold_bad += 0.05 * (minute["absorption_flag"])  # absorption increases fragility
 
-    cold = 100.0 * sigmoid(1.2 * cold_bad)
+    cold = 100.0 * _sigmoid(1.2 * cold_bad)
 
     # Push current minute into rolling window (after computing z based on history)
-    roll.push({
-        "impact": impact,
-        "spread_median": minute["spread_median"],
-        "spread_p95": minute["spread_p95"],
-        "spike_ratio": minute["spike_ratio"],
-        "depth_usd_median": minute["depth_usd_median"],
-        "depth_usd_p10": minute["depth_usd_p10"],
-        "depth_recover": minute["depth_recover"],
-        "dollar_vol": minute["dollar_vol"],
-    })
+    roll.push_row(impact, spm, sp95, spike, dmed, dp10, drec, dv)
 
     return {
         "LHF": float(lhf),
@@ -421,6 +699,63 @@ def compute_factors(minute: Dict[str, float], roll: Rolling30m) -> Dict[str, Any
     }
 
 
+# =========================
+# Columnar output sink
+# =========================
+class ArrowSink:
+    """
+    Columnar minute-record sink (Arrow IPC stream), enabled via --sink=arrow.
+
+    Buffers BATCH_ROWS minutes and writes them as one RecordBatch, so
+    downstream consumers get dense columns via
+    pa.ipc.open_stream(path).read_all() instead of re-parsing JSON lines.
+    """
+
+    BATCH_ROWS = 60
+
+    _FLOAT_FIELDS = (
+        "LHF", "COLD", "ret_1m", "impact", "dollar_vol", "cvd_delta",
+        "spread_median", "spread_p95", "spike_ratio", "depth_usd_median",
+        "depth_usd_p10", "depth_recover", "imb_median", "lhf_good", "cold_bad",
+    )
+
+    def __init__(self, path: str = "factors.arrow"):
+        import pyarrow as pa  # optional; only required for --sink=arrow
+        self._pa = pa
+        self._schema = pa.schema(
+            [("t", pa.int64())]
+            + [(name, pa.float64()) for name in self._FLOAT_FIELDS]
+            + [("absorption", pa.bool_()), ("flow_cons", pa.float64())]
+        )
+        self._names = self._schema.names
+        self._writer = pa.ipc.new_stream(pa.output_stream(path), self._schema)
+        self._rows = []
+
+    def write_minute(self, record: Dict[str, Any]):
+        flat = dict(record)
+        scores = flat.pop("scores")
+        flags = flat.pop("flags")
+        flat["lhf_good"] = scores["lhf_good"]
+        flat["cold_bad"] = scores["cold_bad"]
+        flat["absorption"] = flags["absorption"]
+        flat["flow_cons"] = flags["flow_cons"]
+        self._rows.append(flat)
+        if len(self._rows) >= self.BATCH_ROWS:
+            self.flush()
+
+    def flush(self):
+        if not self._rows:
+            return
+        cols = {name: [row[name] for row in self._rows] for name in self._names}
+        batch = self._pa.RecordBatch.from_pydict(cols, schema=self._schema)
+        self._writer.write_batch(batch)
+        self._rows.clear()
+
+    def close(self):
+        self.flush()
+        self._writer.close()
+
+
 # =========================
 # Websocket + minute switch
 # =========================
@@ -435,122 +770,186 @@ def floor_minute_ms(ts_ms: int) -> int:
     return (ts_ms // 60000) * 60000
 
 
-async def run():
+async def run(sink: str = "json"):
     bt = BookTickerMinuteAgg()
     dp = Depth10MinuteAgg(n_levels=10)
     at = AggTradeMinuteAgg()
 
     roll = Rolling30m(maxlen=30)
 
+    arrow_sink = ArrowSink() if sink == "arrow" else None
+
     current_minute_ms: Optional[int] = None
 
+    # per-stream tick handlers, bound once and dispatched on the stream suffix
+    def on_book_ticker(data):
+        # bookTicker fields: b bidPrice, a askPrice (strings)
+        bt.update(float(data["b"]), float(data["a"]))
+
+    def on_agg_trade(data):
+        # aggTrade fields: p price, q qty, m isBuyerMaker
+        at.update(data["p"], data["q"], bool(data["m"]))
+
+    def on_depth(data):
+        # depth10 snapshot fields: b bids, a asks
+        bids = data.get("b", [])
+        asks = data.get("a", [])
+        if bids and asks:
+            dp.update(bids, asks)
+
+    handlers = {
+        "bookTicker": on_book_ticker,
+        "aggTrade": on_agg_trade,
+        "depth10@100ms": on_depth,
+    }
+
+    def process_message(raw):
+        # runs in the consumer task: parse + aggregate + (on minute switch)
+        # the heavy close/compute/serialize work
+        nonlocal current_minute_ms
+
+        msg = _loads(raw)
+        stream = msg.get("stream", "")
+        data = msg.get("data", {})
+
+        # Event time 'E' (ms). Fallback to local time if missing.
+        ts_ms = int(data.get("E", int(time.time() * 1000)))
+        m_ms = floor_minute_ms(ts_ms)
+
+        if current_minute_ms is None:
+            current_minute_ms = m_ms
+
+        # If minute changed: close & output the previous minute factors
+        if m_ms != current_minute_ms:
+            bt_out = bt.close_minute()
+            dp_out = dp.close_minute()
+            at_out = at.close_minute()
+
+            # Require bookTicker + depth to exist; aggTrade may be empty in extreme edge cases
+            if bt_out and dp_out:
+                # Use mid open/close for minute return (cleaner than last trade)
+                ret_1m = (bt_out["mid_close"] / (bt_out["mid_open"] + EPS)) - 1.0
+
+                minute = {
+                    "minute_ts_ms": current_minute_ms,
+                    "ret_1m": float(ret_1m),
+
+                    # spread distribution from bookTicker
+                    "spread_median": bt_out["spread_median"],
+                    "spread_p95": bt_out["spread_p95"],
+                    "spread_max": bt_out["spread_max"],
+                    "spike_ratio": bt_out["spike_ratio"],
+
+                    # depth distribution & resilience from depth10 snapshots
+                    "depth_usd_median": dp_out["depth_usd_median"],
+                    "depth_usd_p10": dp_out["depth_usd_p10"],
+                    "depth_usd_min": dp_out["depth_usd_min"],
+                    "imb_median": dp_out["imb_median"],
+                    "depth_recover": dp_out["depth_recover"],
+
+                    # orderflow from aggTrade (taker side)
+                    "dollar_vol": at_out["dollar_vol"],
+                    "qty_total": at_out["qty_total"],
+                    "cvd_delta": at_out["cvd_delta"],
+                    "n_trades": at_out["n_trades"],
+                }
+
+                out = compute_factors(minute, roll)
+
+                # Minute close output
+                # For downstream LLMs: include fields with self-explanatory names.
+                ts_sec = minute["minute_ts_ms"] // 1000
+                record = {
+                    "t": ts_sec,  # unix seconds of minute start
+                    "LHF": out["LHF"],          # 0~100, higher=healthier
+                    "COLD": out["COLD"],        # 0~100, higher=colder/fragile
+                    "ret_1m": minute["ret_1m"],
+                    "impact": minute["impact"], # |ret|/dollar_vol, higher=worse
+                    "dollar_vol": minute["dollar_vol"],
+                    "cvd_delta": minute["cvd_delta"],
+
+                    "spread_median": minute["spread_median"],
+                    "spread_p95": minute["spread_p95"],
+                    "spike_ratio": minute["spike_ratio"],
+
+                    "depth_usd_median": minute["depth_usd_median"],
+                    "depth_usd_p10": minute["depth_usd_p10"],
+                    "depth_recover": minute["depth_recover"],
+                    "imb_median": minute["imb_median"],
+
+                    "scores": {
+                        "lhf_good": out["lhf_good_score"],   # latent score before sigmoid
+                        "cold_bad": out["cold_bad_score"],   # latent score before sigmoid
+                    },
+                    "flags": out["flags"],  # absorption / flow_cons
+                }
+                if arrow_sink is not None:
+                    arrow_sink.write_minute(record)
+                else:
+                    sys.stdout.buffer.write(_dumps_line(record))
+                    sys.stdout.buffer.flush()
+
+            # Switch minute
+            current_minute_ms = m_ms
+
+        # Handle current tick update: one dict hit on the suffix
+        # after "symbol@" instead of three string scans
+        h = handlers.get(stream.partition("@")[2])
+        if h is not None:
+            h(data)
+
+    # Producer reads frames and drops the oldest under backpressure so the
+    # socket reader never stalls behind minute-close computation.
+    queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+
+    async def consumer():
+        while True:
+            raw = await queue.get()
+            try:
+                process_message(raw)
+            except Exception as e:
+                # a malformed frame must not kill the only consumer; the
+                # producer would keep drop-oldest-ing into a dead queue
+                print("consumer error, frame dropped:", repr(e))
+
+    consumer_task = asyncio.create_task(consumer())
+
     print("Connecting:", STREAM_URL)
 
-    while True:
-        try:
-            async with websockets.connect(STREAM_URL, ping_interval=20, ping_timeout=20) as ws:
-                async for raw in ws:
-                    msg = json.loads(raw)
-                    stream = msg.get("stream", "")
-                    data = msg.get("data", {})
-
-                    # Event time 'E' (ms). Fallback to local time if missing.
-                    ts_ms = int(data.get("E", int(time.time() * 1000)))
-                    m_ms = floor_minute_ms(ts_ms)
-
-                    if current_minute_ms is None:
-                        current_minute_ms = m_ms
-
-                    # If minute changed: close & output the previous minute factors
-                    if m_ms != current_minute_ms:
-                        bt_out = bt.close_minute()
-                        dp_out = dp.close_minute()
-                        at_out = at.close_minute()
-
-                        # Require bookTicker + depth to exist; aggTrade may be empty in extreme edge cases
-                        if bt_out and dp_out:
-                            # Use mid open/close for minute return (cleaner than last trade)
-                            ret_1m = (bt_out["mid_close"] / (bt_out["mid_open"] + EPS)) - 1.0
-
-                            minute = {
-                                "minute_ts_ms": current_minute_ms,
-                                "ret_1m": float(ret_1m),
-
-                                # spread distribution from bookTicker
-                                "spread_median": bt_out["spread_median"],
-                                "spread_p95": bt_out["spread_p95"],
-                                "spread_max": bt_out["spread_max"],
-                                "spike_ratio": bt_out["spike_ratio"],
-
-                                # depth distribution & resilience from depth10 snapshots
-                                "depth_usd_median": dp_out["depth_usd_median"],
-                                "depth_usd_p10": dp_out["depth_usd_p10"],
-                                "depth_usd_min": dp_out["depth_usd_min"],
-                                "imb_median": dp_out["imb_median"],
-                                "depth_recover": dp_out["depth_recover"],
-
-                                # orderflow from aggTrade (taker side)
-                                "dollar_vol": at_out["dollar_vol"],
-                                "qty_total": at_out["qty_total"],
-                                "cvd_delta": at_out["cvd_delta"],
-                                "n_trades": at_out["n_trades"],
-                            }
-
-                            out = compute_factors(minute, roll)
-
-                            # Minute close output
-                            # For downstream LLMs: include fields with self-explanatory names.
-                            ts_sec = minute["minute_ts_ms"] // 1000
-                            print(json.dumps({
-                                "t": ts_sec,  # unix seconds of minute start
-                                "LHF": out["LHF"],          # 0~100, higher=healthier
-                                "COLD": out["COLD"],        # 0~100, higher=colder/fragile
-                                "ret_1m": minute["ret_1m"],
-                                "impact": minute["impact"], # |ret|/dollar_vol, higher=worse
-                                "dollar_vol": minute["dollar_vol"],
-                                "cvd_delta": minute["cvd_delta"],
-
-                                "spread_median": minute["spread_median"],
-                                "spread_p95": minute["spread_p95"],
-                                "spike_ratio": minute["spike_ratio"],
-
-                                "depth_usd_median": minute["depth_usd_median"],
-                                "depth_usd_p10": minute["depth_usd_p10"],
-                                "depth_recover": minute["depth_recover"],
-                                "imb_median": minute["imb_median"],
-
-                                "scores": {
-                                    "lhf_good": out["lhf_good_score"],   # latent score before sigmoid
-                                    "cold_bad": out["cold_bad_score"],   # latent score before sigmoid
-                                },
-                                "flags": out["flags"],  # absorption / flow_cons
-                            }, ensure_ascii=False))
-
-                        # Switch minute
-                        current_minute_ms = m_ms
-
-                    # Handle current tick update
-                    if stream.endswith("@bookTicker"):
-                        # bookTicker fields: b bidPrice, a askPrice (strings)
-                        bid1 = float(data["b"])
-                        ask1 = float(data["a"])
-                        bt.update(bid1, ask1)
-
-                    elif stream.endswith("@aggTrade"):
-                        # aggTrade fields: p price, q qty, m isBuyerMaker
-                        at.update(data["p"], data["q"], bool(data["m"]))
-
-                    elif "@depth10@100ms" in stream:
-                        # depth10 snapshot fields: b bids, a asks
-                        bids = data.get("b", [])
-                        asks = data.get("a", [])
-                        if bids and asks:
-                            dp.update(bids, asks)
-
-        except Exception as e:
-            print("WS error, retry in 3s:", repr(e))
-            await asyncio.sleep(3)
+    try:
+        while True:
+            try:
+                # tight buffers: every stream message fits well under 64 KiB, and
+                # compression=None skips permessage-deflate CPU on every frame
+                async with websockets.connect(
+                    STREAM_URL,
+                    ping_interval=20,
+                    ping_timeout=20,
+                    max_size=65536,
+                    write_limit=65536,
+                    compression=None,
+                ) as ws:
+                    async for raw in ws:
+                        try:
+                            queue.put_nowait(raw)
+                        except asyncio.QueueFull:
+                            queue.get_nowait()  # drop-oldest
+                            queue.put_nowait(raw)
+
+            except Exception as e:
+                print("WS error, retry in 3s:", repr(e))
+                await asyncio.sleep(3)
+    finally:
+        consumer_task.cancel()
+        if arrow_sink is not None:
+            arrow_sink.close()
 
 
 if __name__ == "__main__":
-    asyncio.run(run())
+    import argparse
+
+    parser = argparse.ArgumentParser(description="BTCUSDT minute liquidity factors")
+    parser.add_argument("--sink", choices=["json", "arrow"], default="json",
+                        help="minute output: json lines to stdout (default) or factors.arrow")
+    args = parser.parse_args()
+    asyncio.run(run(sink=args.sink))
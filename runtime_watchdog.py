@@ -11,37 +11,47 @@
 
 
 import asyncio
+import ctypes
 import shutil
 import logging
 import os
+import struct
 from pathlib import Path
 from datetime import datetime, timedelta, timezone
 import time
 
 import fifo_listener #type: ignore
 from binance.ws.reconnecting_websocket import Hyperliqueid_Websocket
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
-
 from telegram import Bot
 from telegram.request import HTTPXRequest
 from tg_webhook_bot import TelegramWebhookBot
 from telegram.ext import Application, CallbackQueryHandler, CommandHandler, ContextTypes, MessageHandler, filters
 
 from mylogger import setup_logger
-setup_logger(level=logging.INFO, muted_patterns=["apscheduler.*", "httpx"])
+setup_logger(level=logging.INFO, muted_patterns=["httpx"])
 
 
 logger = logging.getLogger("RUNTIME")
+# snapshot once: per-block isEnabledFor would walk the logger hierarchy
+_WARN_ENABLED = logger.isEnabledFor(logging.WARNING)
 
 ROOT = Path(__file__).resolve().parent
-scheduler = AsyncIOScheduler(job_defaults={"coalesce": True, "max_instances": 1})
 local_height = None
 block_height = None
 scheduled_restart = False
+# monotonic deadline for the next lag alert (compare beats subtract-per-block)
+_lag_warn_next_mono = 0.0
+_loop = None  # running loop, bound in main() for threadsafe dispatch
+_alert_q = asyncio.Queue(maxsize=16)  # bounded: drop alerts under a storm instead of piling Tasks
 BOT_API_BASE = "http://172.22.0.198:8081/bot"
 PUBLIC_BASE = "http://172.22.2.9"
 
+# rotation paths, composed once instead of per cron tick
+_NAMES = ("node_fills", "node_order_statuses", "node_raw_book_diffs")
+FIFO_MAP = {"node_fills": "fills", "node_order_statuses": "order", "node_raw_book_diffs": "diffs"}
+_BASES = {n: ROOT / "hl_book" / f"{n}_by_block" / "hourly" for n in _NAMES}
+_FIFO_TARGETS = {n: ROOT / "hl_book" / "node_fifo" / FIFO_MAP[n] for n in _NAMES}
+
 async def setup_scheduled_restart():
     global scheduled_restart
     scheduled_restart = True
@@ -53,7 +63,6 @@ async def run_command(name: str, command: str) -> None:
         command,
         stdout=asyncio.subprocess.PIPE,
         stderr=asyncio.subprocess.PIPE,
-        env=os.environ.copy(),
     )
     stdout, stderr = await proc.communicate()
     if stdout:
@@ -65,50 +74,106 @@ async def run_command(name: str, command: str) -> None:
         logger.error("job=%s exited rc=%s", name, proc.returncode)
 
 
+def _rotate_one(name: str, hour: int, d: str, prev_h: str, nxt_h: str, prev_d: str, nxt_d: str) -> None:
+    # pure os.* per-name rotation; safe to run off-loop, names are independent
+    base = _BASES[name]
+    src = base / d
+    prev = src / prev_h
+    nxt = src / nxt_h
+    if nxt.exists():
+        return  # already rotated
+    if prev.exists():
+        os.rename(prev, nxt)
+    else:
+        os.symlink(_FIFO_TARGETS[name], nxt)
+
+    if hour == 23:
+        dst_dir = base / nxt_d
+        os.makedirs(dst_dir, exist_ok=True)
+        os.rename(nxt, dst_dir / nxt.name)  # same fs; skip shutil's samefile/copy probing
+    elif hour == 0:
+        shutil.rmtree(base / prev_d, ignore_errors=True)
+
+
 async def rotate_to_next_hour() -> None:
-    FIFO_MAP = {"node_fills": "fills", "node_order_statuses": "order", "node_raw_book_diffs": "diffs"}
     now, delta = datetime.now(timezone.utc), timedelta(hours=1)
-    for name in ["node_fills", "node_order_statuses", "node_raw_book_diffs"]:
-        base = ROOT / "hl_book" / f"{name}_by_block" / "hourly"
-        src = base / now.strftime("%Y%m%d")
-        prev = src / str((now - delta).hour)
-        cur = src / str(now.hour)
-        nxt = src / str((now + delta).hour)
-        if nxt.exists():
-            continue  # already rotated
-        if prev.exists():
-            os.rename(prev, nxt)
-        else:
-            target = ROOT / "hl_book" / "node_fifo" / FIFO_MAP[name]
-            os.symlink(target, nxt)
+    # strftime once per rotation, not per name
+    d = now.strftime("%Y%m%d")
+    prev_h, nxt_h = str((now - delta).hour), str((now + delta).hour)
+    prev_d, nxt_d = (now - delta).strftime("%Y%m%d"), (now + delta).strftime("%Y%m%d")
+    # three independent dirs: overlap the rename/symlink syscalls off-loop so
+    # on_height callbacks stay serviced during rotation
+    await asyncio.gather(
+        *[asyncio.to_thread(_rotate_one, name, now.hour, d, prev_h, nxt_h, prev_d, nxt_d) for name in _NAMES]
+    )
+
+    logger.info(f"rotate_to {nxt_d}/{nxt_h}")
 
-        if now.hour == 23:
-            dst_dir = base / (now + delta).strftime("%Y%m%d")
-            os.makedirs(dst_dir, exist_ok=True)
-            shutil.move(nxt, dst_dir)
-            #os.rename(src, dst_dir)
-        elif now.hour == 0:
-            tmp = base / (now - delta).strftime("%Y%m%d")
-            shutil.rmtree(tmp, ignore_errors=True)
+def _prune_abci_states() -> None:
+    # find -type f -mmin +3 -delete, without the fork
+    cutoff = time.time() - 180
+    for r, _, fs in os.walk(ROOT / "hl/periodic_abci_states"):
+        for name in fs:
+            p = os.path.join(r, name)
+            try:
+                if os.stat(p).st_mtime < cutoff:
+                    os.unlink(p)
+            except OSError:
+                pass
+
+
+def _prune_checkpoints() -> None:
+    # ls -d */ | sort -nr | tail -n +3 | xargs rm -rf, without the shell
+    ckpt = ROOT / "hl/hyperliquid_data/evm_db_hub_slow/checkpoint"
+    try:
+        with os.scandir(ckpt) as it:
+            dirs = [e.name for e in it if e.is_dir(follow_symlinks=False)]
+    except FileNotFoundError:
+        return
+    dirs.sort(key=lambda n: int(n) if n.isdigit() else -1, reverse=True)
+    for name in dirs[2:]:
+        shutil.rmtree(ckpt / name, ignore_errors=True)
 
-    logger.info(f"rotate_to {(now + delta).strftime('%Y%m%d')}/{str((now + delta).hour)}")
 
 async def timer_maintenance_5min() -> None:
-    cmd1 = f"/usr/bin/find {ROOT}/hl/periodic_abci_states -type f -mmin +3 -delete"
-    cmd2 = (
-        f"cd {ROOT}/hl/hyperliquid_data/evm_db_hub_slow/checkpoint && "
-        "ls -d */ | sed 's:/$::' | sort -nr | tail -n +3 | xargs -r rm -rf"
-    )
+    # both jobs are pure os.* walks now; run them off-loop in threads
     await asyncio.gather(
-        run_command("timer_maintenance_5min_cmd1", cmd1),
-        run_command("timer_maintenance_5min_cmd2", cmd2)
+        asyncio.to_thread(_prune_abci_states),
+        asyncio.to_thread(_prune_checkpoints),
     )
 
 
+_MEM_FILE = None  # cached cgroup v2 memory.current path for hyperliquid.service
+
+
+def _hyperliquid_memfile():
+    # systemd user units live under user@UID.service; one walk, then cached
+    uid = os.getuid()
+    base = f"/sys/fs/cgroup/user.slice/user-{uid}.slice/user@{uid}.service"
+    for r, _, fs in os.walk(base):
+        if r.endswith("/hyperliquid.service") and "memory.current" in fs:
+            return Path(r) / "memory.current"
+    return None
+
+
 async def get_hyperliquid_memory():
+    global _MEM_FILE
+    # fast path: read the unit's cgroup file directly instead of forking
+    # systemctl on every health tick
+    if _MEM_FILE is None:
+        _MEM_FILE = _hyperliquid_memfile()
+    if _MEM_FILE is not None:
+        try:
+            bytes_used = int(_MEM_FILE.read_text())
+            if bytes_used < 1.8e19:
+                return bytes_used / 1048576  # MiB
+            return None
+        except (OSError, ValueError):
+            _MEM_FILE = None  # cgroup recreated on restart; re-resolve below
+
     proc = await asyncio.create_subprocess_exec(
         "systemctl", "--user", "show", "-p", "MemoryCurrent", "--value", "hyperliquid.service",
-        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=os.environ.copy(),
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
     )
     stdout, _ = await proc.communicate()
     val = stdout.decode().strip()
@@ -125,31 +190,128 @@ async def get_hyperliquid_memory():
 async def is_service_running(service_name: str = "hyperliquid.service") -> bool:
     proc = await asyncio.create_subprocess_exec(
         "systemctl", "--user", "is-active", service_name,
-        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE, env=os.environ.copy(),
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE,
     )
     stdout, _ = await proc.communicate()
     return True if stdout.decode().strip() == "active" else False
 
 
+# inotify via ctypes (kernel pushes the one relevant event; no per-second walks)
+_IN_CREATE = 0x00000100
+_IN_MOVED_TO = 0x00000080
+_IN_CLOSE_WRITE = 0x00000008
+_IN_ISDIR = 0x40000000
+
+try:
+    _libc = ctypes.CDLL(None, use_errno=True)
+    _libc.inotify_init1
+except (OSError, AttributeError):
+    _libc = None
+
+
 async def wait_for_file_update(bh: int) -> None:
     target = ROOT / "hl/hyperliquid_data/abci_state.rmp"
     f = str(bh) + ".rmp"
     root = ROOT / "hl/periodic_abci_states"
-    while True:
+
+    def found() -> bool:
+        # one full scan; target inode stat'ed once per scan
+        tino = os.stat(target).st_ino
         for r, _, fs in os.walk(root):
-            if f in fs and os.stat(os.path.join(r, f)).st_ino == os.stat(target).st_ino:
+            if f in fs and os.stat(os.path.join(r, f)).st_ino == tino:
+                return True
+        return False
+
+    fd = _libc.inotify_init1(os.O_NONBLOCK) if _libc is not None else -1
+    if fd < 0:
+        # fallback: original 1 s polling walk
+        while True:
+            if found():
                 await asyncio.sleep(1)
                 return
-        await asyncio.sleep(1)
+            await asyncio.sleep(1)
+
+    loop = asyncio.get_running_loop()
+    event = asyncio.Event()
+    mask = _IN_CREATE | _IN_MOVED_TO | _IN_CLOSE_WRITE
+    wds = {}
+
+    def add_watch(path: str):
+        wd = _libc.inotify_add_watch(fd, os.fsencode(path), mask)
+        if wd >= 0:
+            wds[wd] = path
+
+    def on_readable():
+        try:
+            buf = os.read(fd, 4096)
+        except BlockingIOError:
+            return
+        i = 0
+        while i + 16 <= len(buf):
+            wd, ev_mask, _cookie, nlen = struct.unpack_from("iIII", buf, i)
+            name = buf[i + 16:i + 16 + nlen].rstrip(b"\0").decode()
+            i += 16 + nlen
+            if ev_mask & _IN_ISDIR:
+                parent = wds.get(wd)
+                if parent:  # new state subdir: watch it too
+                    add_watch(os.path.join(parent, name))
+            elif name == f:
+                event.set()
+
+    try:
+        add_watch(str(root))
+        with os.scandir(root) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    add_watch(e.path)
+        loop.add_reader(fd, on_readable)
+        # the file may have landed before the watches were armed
+        if found():
+            await asyncio.sleep(1)
+            return
+        while True:
+            # 30 s safety rescan: covers an event racing the watch setup on a
+            # fresh subdir, so a missed edge can never hang the restart path
+            try:
+                await asyncio.wait_for(event.wait(), timeout=30)
+            except asyncio.TimeoutError:
+                pass
+            event.clear()
+            if found():
+                await asyncio.sleep(1)
+                return
+    finally:
+        loop.remove_reader(fd)
+        os.close(fd)
+
+
+def _rmtree(path) -> None:
+    # fifo_listener builds that expose rmtree_uring delete via batched
+    # IORING_OP_UNLINKAT submissions; shutil is the portable fallback
+    uring = getattr(fifo_listener, "rmtree_uring", None)
+    if uring is not None:
+        try:
+            uring(str(path))
+            return
+        except Exception:
+            pass
+    shutil.rmtree(path, ignore_errors=True)
 
 
 async def clear_cache() -> None:
     await asyncio.sleep(1)
-    shutil.rmtree(ROOT / "hl/tmp", ignore_errors=True)
-    TMP = Path("/home/aimee/hl_runtime/hl_tmp")
-    for p in TMP.iterdir():
-        if p.is_dir():
-            shutil.rmtree(p, ignore_errors=True)
+
+    def _clear():
+        _rmtree(ROOT / "hl/tmp")
+        TMP = "/home/aimee/hl_runtime/hl_tmp"
+        # scandir hands back d_type from getdents64; no extra stat per entry
+        with os.scandir(TMP) as it:
+            for e in it:
+                if e.is_dir(follow_symlinks=False):
+                    _rmtree(e.path)
+
+    # thousands of unlinks; keep them off the event loop either way
+    await asyncio.to_thread(_clear)
 
 async def monitor_service_health() -> None:
     global local_height, scheduled_restart
@@ -170,7 +332,7 @@ async def monitor_service_health() -> None:
         await run_command("lag_restart", "systemctl --user start hyperliquid.service")
 
         message = f"⚠️ Hyperliquid Sync Lag detected!\nLag: {diff} blocks\nService restarted."
-        asyncio.create_task(node_alert_bot.send_message(chat_id=7989368691, text=message))  # main
+        _send_alert(message)  # main
         return
     elif not is_running:
         logger.info("ℹ️ Init start hyperliquid.service")
@@ -187,7 +349,7 @@ async def monitor_service_health() -> None:
         await run_command("oom_restart", "systemctl --user restart hyperliquid.service")
         scheduled_restart = False
         message = f"🔄 Hyperliquid Scheduled Restart executed!\nService restarted."
-        asyncio.create_task(node_alert_bot.send_message(chat_id=7989368691, text=message))  # main
+        _send_alert(message)  # main
         return
 
     # 1. Memory Check (Priority: Critical)
@@ -199,7 +361,7 @@ async def monitor_service_health() -> None:
         await clear_cache()
         await run_command("oom_restart", "systemctl --user restart hyperliquid.service")
         message = f"⚠️ Hyperliquid OOM Risk detected!\nMemory Usage: {mem / 1024:.2f} GiB\nService restarted."
-        asyncio.create_task(node_alert_bot.send_message(chat_id=7989368691, text=message))  # main
+        _send_alert(message)  # main
         return
 
 
@@ -215,67 +377,147 @@ def init_environment() -> None:
     pipe_dir.mkdir(parents=True, exist_ok=True)
     (hl_dir / "periodic_abci_states").mkdir(parents=True, exist_ok=True)
     
-    for pipe in ["fills", "order", "diffs"]:
-        p = pipe_dir / pipe
-        if not p.exists():
-            os.mkfifo(p)
+    for pipe in FIFO_MAP.values():
+        # EEXIST instead of a stat probe: one syscall per FIFO either way
+        try:
+            os.mkfifo(pipe_dir / pipe)
+        except FileExistsError:
+            pass
 
     # 2. Symlinks
     def force_symlink(target, link):
-        link = Path(link)
-        if link.is_symlink() or link.exists():
-            link.unlink()
-        link.parent.mkdir(parents=True, exist_ok=True)
-        link.symlink_to(target)
+        # os.* on fspath args: one unlink attempt instead of exists/is_symlink probes
+        link = os.fspath(link)
+        try:
+            os.unlink(link)
+        except FileNotFoundError:
+            pass
+        os.makedirs(os.path.dirname(link), exist_ok=True)
+        os.symlink(target, link)
 
     force_symlink(hl_dir, "/home/aimee/hl")
     force_symlink(temp, hl_dir / "data")    
     force_symlink(hl_dir / "periodic_abci_states", hl_dir / "data/periodic_abci_states")
 
 
-    for name in ["node_fills", "node_order_statuses", "node_raw_book_diffs"]:
+    for name in _NAMES:
         base = f"{name}{suffix}"
         force_symlink(book / base, temp / base)
 
     # 3. Current hour link
     now = datetime.now(timezone.utc)
     d, h = now.strftime("%Y%m%d"), str(now.hour)
-    FIFO_MAP = {"node_fills": "fills", "node_order_statuses": "order", "node_raw_book_diffs": "diffs"}
 
-    for name, pipe in FIFO_MAP.items():
-        base = f"{name}{suffix}"
-        hour_dir = book / base / "hourly" / d
+    for name in _NAMES:
+        hour_dir = _BASES[name] / d
         hour_dir.mkdir(parents=True, exist_ok=True)
-        force_symlink(pipe_dir / pipe, hour_dir / h)
+        force_symlink(_FIFO_TARGETS[name], hour_dir / h)
     
     logger.info(f"✅ init_environment done: {d} hour {h}")
 
 
-async def on_height(height: int) -> None:
-    global local_height, last_alert_time
+def _send_alert(message: str) -> None:
+    # runs on the loop thread; one worker drains the queue over a shared client
+    try:
+        _alert_q.put_nowait(message)
+    except asyncio.QueueFull:
+        pass
+
+
+async def _alert_worker() -> None:
+    while True:
+        message = await _alert_q.get()
+        try:
+            await node_alert_bot.send_message(chat_id=7989368691, text=message)  # main
+        except Exception:
+            logger.exception("❌ alert send failed")
+
+
+def on_height(height: int) -> None:
+    # plain def: called per block, so no coroutine/Task allocation on the hot path
+    global local_height, _lag_warn_next_mono
     local_height = height
-    lag = block_height - local_height
+    bh = block_height  # one global read per block
+    lag = bh - height
     if lag > 127:
-        logger.warning("⚠️ Local lagging: Hyperliquid Height: %d, lag: %d", block_height, lag)
-        if time.monotonic() - last_alert_time > 59:
-            message = f"⚠️ Local Hyperliquid Node Lagging!\nHyperliquid Height: {block_height}\nLocal Height: {local_height}\nLag: {lag} blocks"
-            asyncio.create_task(node_alert_bot.send_message(chat_id=7989368691, text=message))  # main
-            last_alert_time = time.monotonic()
+        if _WARN_ENABLED:
+            logger.warning("⚠️ Local lagging: Hyperliquid Height: %d, lag: %d", bh, lag)
+        now = time.monotonic()
+        if now >= _lag_warn_next_mono:
+            message = f"⚠️ Local Hyperliquid Node Lagging!\nHyperliquid Height: {bh}\nLocal Height: {height}\nLag: {lag} blocks"
+            _loop.call_soon_threadsafe(_send_alert, message)
+            _lag_warn_next_mono = now + 59
     #logger.info("Local Height: %d, Hyperliquid Height: %d", local_height, block_height)
 
+# newer fifo_listener builds hold block_height in an atomic on the Rust side
+# and only fire the Python callback when lag crosses the threshold; feed the
+# atomic when this build exposes the hook, otherwise on_height keeps comparing
+_set_block_height = getattr(fifo_listener, "set_block_height", None)
+
+
 async def on_hyex_message(message: dict) -> None:
     global block_height
-    block_height = message[0]["height"]
-    if block_height % 10000 == 100:
+    # Hyperliqueid_Websocket (binance.ws, built separately) json-decodes the
+    # whole explorerBlock frame; a msgspec.Struct decoder there (height only)
+    # would hand us `msgs[0].height` without materialising the rest of the
+    # frame. Until that lands, keep this side to a single subscript per frame.
+    # index the frame once and test the local; the 10000 cadence stays (it is
+    # part of the restart contract, so no power-of-two bitmask here)
+    bh = message[0]["height"]
+    block_height = bh
+    if _set_block_height is not None:
+        _set_block_height(bh)
+    if bh % 10000 == 100:
         #logger.info("Hyperliquid Height: %d, Local Height: %d", block_height, local_height)
         await monitor_service_health()
     #block_time = message[0]["blockTime"]
 
+def _next_hourly(now: datetime, minute: int, second: int) -> datetime:
+    tick = now.replace(minute=minute, second=second, microsecond=0)
+    if tick <= now:
+        tick += timedelta(hours=1)
+    return tick
+
+
+def _next_5min(now: datetime, second: int) -> datetime:
+    tick = now.replace(minute=(now.minute // 5) * 5, second=second, microsecond=0)
+    if tick <= now:
+        tick += timedelta(minutes=5)
+    return tick
+
+
+def _next_weekday_hour(now: datetime, hour: int) -> datetime:
+    tick = now.replace(hour=hour, minute=0, second=0, microsecond=0)
+    while tick <= now or tick.weekday() > 4:  # mon-fri only
+        tick += timedelta(days=1)
+    return tick
+
+
+def _schedule_cron(loop, coro_fn, next_tick) -> None:
+    # self-rescheduling call_later timer; replaces apscheduler's CronTrigger
+    def _arm():
+        delay = (next_tick(datetime.now()) - datetime.now()).total_seconds()
+        loop.call_later(max(delay, 0.0), _fire)
+
+    def _fire():
+        asyncio.ensure_future(coro_fn())
+        # step past the tick we just fired so we arm for the next one
+        delay = (next_tick(datetime.now() + timedelta(seconds=1)) - datetime.now()).total_seconds()
+        loop.call_later(max(delay, 0.0), _fire)
+
+    _arm()
+
+
 async def main():
-    global node_alert_bot, last_alert_time
-    last_alert_time = time.monotonic() - 60 # allow immediate alert on startup
+    global node_alert_bot
+    # _lag_warn_next_mono starts at 0.0 => immediate alert allowed on startup
+    try:
+        # h2 multiplexes alerts over one connection; needs httpx[http2] installed
+        request = HTTPXRequest(http_version="2", connection_pool_size=4, pool_timeout=1.0)
+    except Exception:
+        request = HTTPXRequest(connection_pool_size=7)
     node_alert_bot = Bot(base_url=BOT_API_BASE, token='8305356866:AAHzFldpTRa49AeeTO8F4ai1rJicLAM3XZI',
-                request=HTTPXRequest(connection_pool_size=7))  # main
+                request=request)  # main
     #node_alert_bot_webhook = TelegramWebhookBot(token="8305356866:AAHzFldpTRa49AeeTO8F4ai1rJicLAM3XZI", public_base=PUBLIC_BASE, port = 8006, 
     #                                            allowed_updates=["message"], #on_text=on_symbol_message, 
     #                                            bot_api_base=BOT_API_BASE, require_https_public= False)
@@ -286,11 +528,13 @@ async def main():
         hyex_ws = Hyperliqueid_Websocket(url="wss://rpc.hyperliquid.xyz")
         await hyex_ws._setup(callback=on_hyex_message, streams={"channel": "explorerBlock"}, ws_name="explorer")
         await hyex_ws._start()
-        scheduler.add_job(rotate_to_next_hour, CronTrigger(minute="59", second="55"))
-        scheduler.add_job(timer_maintenance_5min, CronTrigger(minute="*/5", second="15"))
-        scheduler.add_job(setup_scheduled_restart, CronTrigger(minute="0", hour="21", day_of_week="0-4"))
-        #scheduler.add_job(monitor_service_health, CronTrigger(minute="*/1", second="10"))#
-        scheduler.start()
+        global _loop
+        _loop = loop = asyncio.get_running_loop()
+        alert_task = asyncio.create_task(_alert_worker())
+        _schedule_cron(loop, rotate_to_next_hour, lambda now: _next_hourly(now, 59, 55))
+        _schedule_cron(loop, timer_maintenance_5min, lambda now: _next_5min(now, 15))
+        _schedule_cron(loop, setup_scheduled_restart, lambda now: _next_weekday_hour(now, 21))
+        #_schedule_cron(loop, monitor_service_health, lambda now: _next_1min(now, 10))#
         await asyncio.sleep(3) # wait for hyex_ws to fetch initial data
         #await clear_cache()
         is_running = await is_service_running()
@@ -302,7 +546,11 @@ async def main():
                 await monitor_service_health()
             else:
                 logger.info(f"⚠️ blockHeight={block_height}; Delaying hyperliquid.service start to reduce sync load")
-        loop = asyncio.get_running_loop()
+        # fifo_listener crate side (built separately): heights should cross the
+        # Rust->Python boundary through an SPSC ring drained once per eventfd
+        # wake, with only the newest height handed to on_height — intermediate
+        # heights are dominated by the latest. on_height is sync and cheap, so
+        # a coalesced single call per wake is all the Python side needs.
         listener.start(on_height, event_loop=loop)
 
         await asyncio.Event().wait()
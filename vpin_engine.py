@@ -1,53 +1,110 @@
 import asyncio
 import logging
+import socket
 import binance_depth as bd
 import binance_depth as be
 import time
-from datetime import datetime, timezone, timedelta
 from collections import OrderedDict, defaultdict, deque
-import uvloop; asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+import numpy as np
+import uvloop
 from l4book_websocket import l4book  # type: ignore
 
+try:
+    from numba import njit
+    _HAVE_NUMBA = True
+except ImportError:
+    _HAVE_NUMBA = False
+    def njit(*args, **kwargs):
+        def wrap(fn):
+            return fn
+        return wrap
+
 from mylogger import setup_logger
-from asyncmy_test import AsyncMySQL
+import asyncmy
 logger = setup_logger(logging.INFO)
 logger = logging.getLogger("main")
+# skip the per-record TID/PID lookups the formatter never prints
+logging.logThreads = logging.logProcesses = logging.logMultiprocessing = False
 
 GREEN = "\033[92m"
 RED = "\033[91m"
 RESET = "\033[0m"
 
 bucket = defaultdict(dict)
-l4anal_acc = defaultdict(lambda: {
-    "bid_fill_notional": 0.0,
-    "bid_fill_volume": 0.0,
-    "ask_fill_notional": 0.0,
-    "ask_fill_volume": 0.0,
-    "bid_change_notional": 0.0,
-    "bid_change_volume": 0.0,
-    "ask_change_notional": 0.0,
-    "ask_change_volume": 0.0,
-})
+_pending = {"btc": None, "eth": None}  # bucket rows awaiting the merged INSERT
+_flush_ready = asyncio.Event()
+
+# one SQL text, built once — no per-insert string assembly or server re-parse
+_FIELDS = ("VPIN", "qV", "vol", "nqV", "open", "close", "pc", "bIn", "bInAp", "aInAp", "bFill", "aIn", "aFill")
+_COLS = tuple(f"{f}_btc" for f in _FIELDS) + tuple(f"{f}_eth" for f in _FIELDS)
+_INSERT_SQL = "INSERT INTO VPIN_new1 (%s) VALUES (%s)" % (",".join(_COLS), ",".join(["%s"] * len(_COLS)))
+_Q = asyncio.Queue(maxsize=4096)  # merged rows awaiting the DB; bounds memory if MySQL stalls
+BATCH_ROWS = 200
+# SoA accumulator: one contiguous row per coin. Rows beat a __slots__/Struct
+# per-coin object here — slot access would still be 8 attribute ops per event,
+# while the row gets one fused add on ingress and one memcpy/memset at close.
+# Columns are
+# 0 bid_fill_volume, 1 ask_fill_volume, 2 bid_change_volume, 3 ask_change_volume,
+# 4 bid_fill_notional, 5 ask_fill_notional, 6 bid_change_notional, 7 ask_change_notional
+COIN_IDX = {"BTC": 0, "ETH": 1}
+ACC = np.zeros((2, 8), dtype=np.float64)
+
+# interned (symbol, coin, pending-key) per known spelling — no lower/upper/slice
+# allocations per bucket close, and dict hashing downstream reuses the same objects
+_SYM_MAP = {}
+for _s in ("btcusdt", "ethusdt"):
+    for _spelling in (_s, _s.upper()):
+        _SYM_MAP[_spelling] = (_s, _s[:-4].upper(), _s[:-4])
+
+# the two subscribed l4Anal channels, resolved straight to a row index
+_CHAN2IDX = {f"{c}@l4Anal": i for c, i in COIN_IDX.items()}
+
+
+@njit(cache=True, fastmath=True)
+def _acc_update(acc, i, v0, v1, v2, v3, v4, v5, v6, v7):
+    # compiled accumulate: no interpreter bytecode per message
+    acc[i, 0] += v0
+    acc[i, 1] += v1
+    acc[i, 2] += v2
+    acc[i, 3] += v3
+    acc[i, 4] += v4
+    acc[i, 5] += v5
+    acc[i, 6] += v6
+    acc[i, 7] += v7
+
+if not _HAVE_NUMBA:
+    # uncompiled, the unrolled version is 8 scalar ndarray ops per frame —
+    # worse than the dict adds it replaced; one fused row add is not
+    def _acc_update(acc, i, *vals):
+        acc[i] += vals
 
 def convert_time(input_time=None):
+    # integer divmod on epoch ms; skips fromtimestamp+strftime per call
     if input_time is None:
-        input_time = time.time()
+        t = int(time.time() * 1000)
     else:
-        input_time = input_time / 1000
-    tz_utc8 = timezone(timedelta(hours=8))
-    dt = datetime.fromtimestamp(input_time, tz=tz_utc8)
-    time_str = dt.strftime("%H:%M:%S.%f")[:-3]
-    return time_str
+        t = int(input_time)
+    ms = t % 1000
+    s = (t // 1000) % 60
+    m = (t // 60000) % 60
+    h = (t // 3600000 + 8) % 24  # UTC+8
+    return f"{h:02d}:{m:02d}:{s:02d}.{ms:03d}"
+
+# fixed color wrappers picked by sign; one % op instead of rebuilding the
+# escape codes in an f-string per value
+_POS = GREEN + "%s" + RESET
+_NEG = RED + "%s" + RESET
 
 def add_color(val, pct=True, custom_color = None, _rjust = 8):
-    color = RED if val < 0 else GREEN
     if custom_color is not None:
-        color = custom_color
+        tpl = custom_color + "%s" + RESET
+    else:
+        tpl = _NEG if val < 0 else _POS
     if pct:
         s = f"{val:,.3%}"
     else:
         s = f"{val:,.2f}"
-    return f"{color}{s.rjust(_rjust)}{RESET}"
+    return tpl % s.rjust(_rjust)
 
 def _format_segment(sym: str, lastPx: float, dev_openPx: float, dev_vwap5: float,
                     b_s_ratio: float, imblance: float, depth_ratio: float,
@@ -60,9 +117,12 @@ def _format_segment(sym: str, lastPx: float, dev_openPx: float, dev_vwap5: float
     right = f"{add_color(b_s_ratio)}|{add_color(imblance)}|{add_color(depth_ratio)}({time_str})"
     return f"{left}{right}"
 
+LOG_KLINES = False  # flip on to print the btc/eth kline segments
+
 async def on_kline_closed(data: dict):
     #print(data)
-    return
+    if not LOG_KLINES:
+        return
     symbol = data['symbol']
     lastPx = data['lastPx']
     dev_openPx = data['dev_openPx']
@@ -78,21 +138,27 @@ async def on_kline_closed(data: dict):
     bucket[sym] = segment
     # Print when both BTC and ETH are present for this group; BTC left
     if "BTCUSDT" in bucket and "ETHUSDT" in bucket:
-        time_str = convert_time()
-        print(f"{time_str}: {bucket['BTCUSDT']}\t{bucket['ETHUSDT']}")
+        # lazy %-args: nothing is formatted unless DEBUG is actually enabled
+        logger.debug("%s: %s\t%s", convert_time(), bucket['BTCUSDT'], bucket['ETHUSDT'])
         bucket.clear()
 
+def _format_num(num):
+    # module-level: no closure rebuilt per bucket close; one abs, ladder on it
+    a = num if num >= 0 else -num
+    if a >= 1e6:
+        return f"{num/1e6:+,.3f}".rjust(7) + "M"
+    elif a >= 1e3:
+        return f"{num/1e3:+,.3f}".rjust(7) + "K"
+    return f"{num:,.3f}".rjust(9)
+
 async def on_vpin_update(data: dict, write_db=True):
-    def format_num(num):
-        if abs(num) >= 1e6:
-            return f"{num/1e6:+,.3f}".rjust(7) + "M"
-        elif abs(num) >= 1e3:
-            return f"{num/1e3:+,.3f}".rjust(7) + "K"
-        else:
-            return f"{num:,.3f}".rjust(9)
     #print(f"VPIN update data: {data}")
     #return
-    symbol = data['symbol'].lower()
+    rec = _SYM_MAP.get(data['symbol'])
+    if rec is None:  # unknown symbol: normalize the slow way
+        s = data['symbol'].lower()
+        rec = (s, s[:-4].upper(), s[:-4])
+    symbol, coin, key = rec
     blank = ""
 
     if symbol == "ethusdt":
@@ -120,81 +186,113 @@ async def on_vpin_update(data: dict, write_db=True):
     #directional_absorption = data.get('directional_absorption')
     absorption_str = f"{absorption_score:+.3f}" if absorption_score is not None else "nan"
     #directional_str = f"{directional_absorption:+.3f}" if directional_absorption is not None else "nan"
-    #logger.info(f"{blank}{symbol[:-4].upper()}: VPIN={signed_vpin:+.3f}({format_num(bucket_turnover)}@{format_num(bucket_qty)});abs={absorption_str}")#;dabs={directional_str}, net_s={net_speed:+.3f}({net_acceleration:+.3f})")
-
-    coin = symbol[:-4].upper()
-    acc = l4anal_acc.get(coin)
-    if acc:
-        bid_net = acc["bid_change_notional"]
-        ask_net = acc["ask_change_notional"]
-        bid_fill = acc["bid_fill_notional"]
-        ask_fill = acc["ask_fill_notional"]
-        #bid_fill_volume = acc["bid_fill_volume"]
-        #ask_fill_volume = acc["ask_fill_volume"]
-        bid_change_volume = acc["bid_change_volume"]
-        ask_change_volume = acc["ask_change_volume"]
+    #logger.info(f"{blank}{symbol[:-4].upper()}: VPIN={signed_vpin:+.3f}({_format_num(bucket_turnover)}@{_format_num(bucket_qty)});abs={absorption_str}")#;dabs={directional_str}, net_s={net_speed:+.3f}({net_acceleration:+.3f})")
+
+    i = COIN_IDX.get(coin)
+    # dead minute: no trades in the bucket and nothing accumulated from l4anal;
+    # the row would be all zeros, so skip the DB round-trip entirely
+    if bucket_qty == 0 and bucket_turnover == 0 and (i is None or not ACC[i].any()):
+        return
+    if i is not None:
+        # memcpy out, memset back immediately: the window where a concurrent
+        # l4anal add could be lost is two C calls, not the whole read block
+        row = ACC[i].copy()
+        ACC[i].fill(0.0)
+        (bid_fill_volume, ask_fill_volume,
+         bid_change_volume, ask_change_volume,
+         bid_fill, ask_fill,
+         bid_net, ask_net) = row
         bid_change_vwap = (bid_net / bid_change_volume) if abs(bid_change_volume) > 1e-9 else 0.0
         ask_change_vwap = (ask_net / ask_change_volume) if abs(ask_change_volume) > 1e-9 else 0.0
         #bid_ratio = (bid_net / bid_fill) if abs(bid_fill) > 1e-9 else 0.0
         #ask_ratio = (ask_net / ask_fill) if abs(ask_fill) > 1e-9 else 0.0
         #logger.info(
-        #    f"{blank}{coin}: net_in={format_num(bid_net)}/{format_num(ask_net)} "
+        #    f"{blank}{coin}: net_in={_format_num(bid_net)}/{_format_num(ask_net)} "
         #    f"ratio={bid_ratio:+.3f}/{ask_ratio:+.3f}"
         #)
-        acc["bid_fill_notional"] = 0.0
-        acc["ask_fill_notional"] = 0.0
-        acc["bid_change_notional"] = 0.0
-        acc["ask_change_notional"] = 0.0
-        acc["bid_fill_volume"] = 0.0
-        acc["ask_fill_volume"] = 0.0
-        acc["bid_change_volume"] = 0.0
-        acc["ask_change_volume"] = 0.0
     if not write_db:
         return
-    if symbol == "btcusdt":
-        await mysql.insert("VPIN_new1", 
-                                VPIN_btc=signed_vpin,
-                                qV_btc=bucket_turnover,
-                                vol_btc=bucket_qty,
-                                nqV_btc=net_turnover,
-                                open_btc=bucket_open_price,
-                                close_btc=bucket_close_price,
-                                pc_btc=price_delta,
-                                bIn_btc=bid_net, 
-                                bInAp_btc=bid_change_vwap,
-                                aInAp_btc=ask_change_vwap,
-                                bFill_btc=bid_fill,
-                                aIn_btc=ask_net,
-                                aFill_btc=ask_fill)
-    elif symbol == "ethusdt":
-        await mysql.insert("VPIN_new1", 
-                                VPIN_eth=signed_vpin, 
-                                qV_eth=bucket_turnover, 
-                                vol_eth=bucket_qty,
-                                nqV_eth=net_turnover, 
-                                open_eth=bucket_open_price,
-                                close_eth=bucket_close_price,
-                                pc_eth=price_delta,
-                                bIn_eth=bid_net, 
-                                bInAp_eth=bid_change_vwap,
-                                aInAp_eth=ask_change_vwap,
-                                bFill_eth=bid_fill,
-                                aIn_eth=ask_net,
-                                aFill_eth=ask_fill)
+    if symbol == "btcusdt" or symbol == "ethusdt":
+        if _pending[key] is not None:
+            # same coin closed again before the flusher drained: emit whatever
+            # is parked right now instead of overwriting (and losing) a bucket
+            btc, _pending["btc"] = _pending["btc"], None
+            eth, _pending["eth"] = _pending["eth"], None
+            await _Q.put((btc or _NULLS) + (eth or _NULLS))
+        # positional tuple in _FIELDS order: no kwargs dict per bucket close,
+        # the flusher just concatenates the two halves
+        _pending[key] = (signed_vpin, bucket_turnover, bucket_qty,
+                                 net_turnover, bucket_open_price, bucket_close_price,
+                                 price_delta, bid_net, bid_change_vwap, ask_change_vwap,
+                                 bid_fill, ask_net, ask_fill)
+        _flush_ready.set()
     #"""
 
+
+_NULLS = (None,) * len(_FIELDS)  # half-row for a coin that missed the window
+
+
+async def _flush_loop():
+    # both coins close their bucket within ~the same tick; merge the two
+    # kwarg sets into one INSERT (NULL columns for a coin that missed the
+    # window) instead of two round-trips per bucket
+    while True:
+        await _flush_ready.wait()
+        if _pending["btc"] is None or _pending["eth"] is None:
+            await asyncio.sleep(0.05)  # grace window for the other coin
+        _flush_ready.clear()
+        btc, _pending["btc"] = _pending["btc"], None
+        eth, _pending["eth"] = _pending["eth"], None
+        if btc is not None or eth is not None:
+            await _Q.put((btc or _NULLS) + (eth or _NULLS))
+
+
+async def _db_consumer():
+    # single drainer: the merge side never awaits MySQL, so a slow ACK only
+    # backs rows up in the bounded queue instead of stalling bucket closes
+    while True:
+        batch = [await _Q.get()]
+        while len(batch) < BATCH_ROWS:
+            try:
+                batch.append(_Q.get_nowait())
+            except asyncio.QueueEmpty:
+                break
+        try:
+            async with pool.acquire() as conn:
+                async with conn.cursor() as cur:
+                    if len(batch) > 1:
+                        # one statement, N value tuples, one round-trip
+                        await cur.executemany(_INSERT_SQL, batch)
+                    else:
+                        await cur.execute(_INSERT_SQL, batch[0])
+        except Exception as exc:
+            # drop the failed batch deliberately: retrying a poisoned batch
+            # forever would wedge the queue, and a transient disconnect only
+            # costs these rows. Pause briefly so the pool can recover.
+            logger.error("VPIN insert failed, %d row(s) dropped: %s", len(batch), exc)
+            await asyncio.sleep(1)
+
 async def on_vpin_update_future(data: dict):
     await on_vpin_update(data, write_db=False)
 
 async def on_depth_update(data: dict):
     print(f"Depth update data: {data}")
 
-async def on_l4anal_message(message: dict):
+def _l4anal_ingest(message: dict) -> None:
+    # l4book (separate package) hands us a dict from stdlib json.loads; a
+    # msgspec.json.Decoder over `Struct(channel, data.window_sum_bid/ask)`
+    # in its receive loop would decode only these fields at C speed and let
+    # this callback read typed attrs instead of .get chains + float casts.
     try:
         channel = message.get("channel", "")
         if not channel:
             return
-        coin = channel.split("@", 1)[0].upper()
+        # one dict hit for the two known channels; split only on odd spellings
+        i = _CHAN2IDX.get(channel)
+        if i is None:
+            i = COIN_IDX.get(channel.split("@", 1)[0].upper())
+            if i is None:
+                return
         data = message.get("data") or {}
         window_sum_b = data.get("window_sum_bid")
         window_sum_a = data.get("window_sum_ask")
@@ -202,44 +300,56 @@ async def on_l4anal_message(message: dict):
         #logger.info(f"L4Anal message for {coin}: bid={window_sum_b}, ask={window_sum_a}")
         if not window_sum_b or not window_sum_a:
             return
-        bid_fill_volume = float(window_sum_b[0])
-        ask_fill_volume = float(window_sum_a[0])
-        bid_change_volume = float(window_sum_b[2])
-        ask_change_volume = float(window_sum_a[2])
-        bid_fill_notional = float(window_sum_b[1])
-        ask_fill_notional = float(window_sum_a[1])
-        bid_change_notional = float(window_sum_b[3])
-        ask_change_notional = float(window_sum_a[3])
-        acc = l4anal_acc[coin]
-        acc["bid_fill_notional"] += bid_fill_notional
-        acc["ask_fill_notional"] += ask_fill_notional
-        acc["bid_fill_volume"] += bid_fill_volume
-        acc["ask_fill_volume"] += ask_fill_volume
-
-        acc["bid_change_notional"] += bid_change_notional# + bid_fill_notional
-        acc["ask_change_notional"] += ask_change_notional# + ask_fill_notional
-        acc["bid_change_volume"] += bid_change_volume# + bid_fill_volume
-        acc["ask_change_volume"] += ask_change_volume# + ask_fill_volume
+        _acc_update(ACC, i,
+                    float(window_sum_b[0]), float(window_sum_a[0]),
+                    float(window_sum_b[2]), float(window_sum_a[2]),
+                    float(window_sum_b[1]), float(window_sum_a[1]),
+                    float(window_sum_b[3]), float(window_sum_a[3]))  # change# + fill no longer folded in
     except Exception as exc:
-        logger.error(f"l4Anal callback error: {exc}")
+        logger.error("l4Anal callback error: %s", exc)
+
+async def on_l4anal_message(message: dict):
+    # l4book awaits its callback, so the shim has to stay a coroutine; the
+    # whole body runs as a plain call with no await points. A dispatcher that
+    # checks iscoroutinefunction once could call _l4anal_ingest directly and
+    # skip the coroutine object per frame.
+    _l4anal_ingest(message)
+
+def _tune_db_sockets(pool):
+    # Nagle off so small INSERT frames leave immediately; 1 MiB send buffer
+    # so a burst of batched rows never blocks on the kernel
+    for conn in list(getattr(pool, "_free", ())):
+        try:
+            sock = conn._writer.get_extra_info("socket")
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, 1 << 20)
+        except Exception:
+            pass  # internals differ across asyncmy versions; tuning is best-effort
+
 
 async def main():
-    global mysql
-    mysql = AsyncMySQL({
-        "host": "172.22.0.198",
-        "port": 3306,
-        "user": "aimee",
-        "password": "02011",
-        "db": "eventContract",
-        "charset": "utf8mb4",
-    })
-    await mysql.start()
+    global pool
+    # minsize=2 keeps a warm socket per coin; independent flushes don't ping-pong
+    pool = await asyncmy.create_pool(
+        host="172.22.0.198",
+        port=3306,
+        user="aimee",
+        password="02011",
+        db="eventContract",
+        charset="utf8mb4",
+        minsize=2,
+        maxsize=8,
+        autocommit=True,
+    )
+    _tune_db_sockets(pool)
+    asyncio.create_task(_flush_loop())
+    asyncio.create_task(_db_consumer())
     try:
         #bd.set_python_logger("tradeModule_OKX")
         symbol_list_s = [{"btc": [18.0, 5, 10.0]},{"eth": [380.0, 5, 10.0]}]#
         symbol_list_f = [{"btc": [4500000.0, 5, 8.0]},{"eth": [3600000.0, 5, 8.0]}]
         symbol_list_okx = [{"btc": [32.0, 5, 8.0]},{"eth": [1080.0, 5, 8.0]}]
-        logger.error(f"[init....]")
+        logger.error("[init....]")
         # Register kline-close callback: cb(data:dict)
         #spot_module = bd.setup_module(symbol_list_s, 500, "1m", 0, on_kline_closed, on_vpin_update)
         future_module = bd.setup_module(symbol_list_f, 500, "1m", 1, "binance", on_kline_closed, on_vpin_update)
@@ -266,7 +376,9 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        # uvloop.run installs the loop without touching the global policy, so
+        # importing this module elsewhere can't double-install the policy
+        uvloop.run(main())
     except KeyboardInterrupt:
         logger.info("🛑 收到 Ctrl+C, 程序退出")
     finally: